@@ -1,17 +1,32 @@
+import re
+from concurrent.futures import ThreadPoolExecutor
 import pandas as pd
 import numpy as np
 from pathlib import Path
 
+# Motor de lectura de Excel y escritura de hojas compartidos con transformar_weeks.py
+from transformar_weeks import EXCEL_ENGINE, HEADER_FORMAT, open_workbook, write_sheet
+
 # ----------------------------------------------------------
 # CONFIGURACIÓN BÁSICA
 # ----------------------------------------------------------
 INPUT_FILE = "Salida/00. SM-SourceOfTruth.xlsx"        # <- Cambia por el nombre de tu archivo
 SHEET_NAME = 0                         # Hoja a leer (0 = primera hoja)
 OUTPUT_FILE = "reporte_calidad_datos.xlsx"
+MAX_WORKERS = 8                        # Hilos para el resumen por columna
+DUP_CHUNK_ROWS = 500_000               # Filas por bloque al calcular hashes de duplicados
 
 # Si tu archivo está en otra carpeta, puedes poner la ruta completa, ej:
 # INPUT_FILE = r"C:\ruta\a\tu\archivo.xlsx"
 
+# Patrón para quitar símbolos de moneda y separadores de miles
+# (se compila una sola vez y se reutiliza en todas las columnas)
+_MONEY_RE = re.compile(r"[\$,]")
+
+# Tabla de traducción para limpiar valores numéricos en una sola pasada
+# ($, comas, % y espacios, incluido el espacio duro que a veces trae Excel)
+_NUMERIC_TRANS = str.maketrans("", "", "$,% \xa0")
+
 # ----------------------------------------------------------
 # FUNCIONES AUXILIARES
 # ----------------------------------------------------------
@@ -24,20 +39,16 @@ def limpiar_nombre_columnas(df: pd.DataFrame) -> pd.DataFrame:
     df.columns = df.columns.str.strip()
     return df
 
-def a_numerico(col: pd.Series) -> pd.Series:
+def a_numerico(col: pd.Series) -> np.ndarray:
     """
     Intenta convertir una serie a numérico:
     - Quita $, comas, %, espacios
-    - Devuelve float con NaN donde no se pueda convertir
+    - Devuelve un array float64 con NaN donde no se pueda convertir
     """
-    return (
-        col.astype(str)
-        .str.replace(r"[\$,]", "", regex=True)
-        .str.replace("%", "", regex=False)
-        .str.strip()
-        .replace({"": np.nan, "nan": np.nan, "None": np.nan})
-        .astype(float)
-    )
+    # to_numeric ya ignora tabs/saltos de línea en los extremos y convierte
+    # "", "nan" y "None" en NaN con errors="coerce"
+    limpio = col.astype(str).str.translate(_NUMERIC_TRANS)
+    return pd.to_numeric(limpio, errors="coerce").to_numpy(dtype=np.float64)
 
 def inferir_tipo(col: pd.Series) -> str:
     """
@@ -47,13 +58,30 @@ def inferir_tipo(col: pd.Series) -> str:
         return "numérico"
     if pd.api.types.is_datetime64_any_dtype(col):
         return "fecha"
-    # intento de conversión a numérico
+    # intento de conversión a numérico (sobre una muestra de valores no nulos)
+    muestra = col.dropna().head(20)
+    if muestra.empty:
+        return "texto"
     try:
-        _ = pd.to_numeric(col.dropna().head(20).str.replace(r"[\$,]", "", regex=True), errors="raise")
+        _ = pd.to_numeric(muestra.str.replace(_MONEY_RE, "", regex=True), errors="raise")
         return "texto (numérico en texto)"
     except Exception:
         return "texto"
 
+def unicos_numericos(col: pd.Series, n_muestra: int = 5) -> tuple:
+    """
+    Para columnas numéricas: cuenta los valores únicos ordenando el array
+    (más rápido que hashear cada float) y toma la muestra de los primeros
+    valores distintos mirando solo el inicio de la columna.
+    """
+    valores = col.dropna().to_numpy()
+    ordenados = np.sort(valores)
+    n_unique = int(ordenados.size > 0) + int(np.count_nonzero(ordenados[1:] != ordenados[:-1]))
+    muestra = pd.unique(valores[:1000])[:n_muestra]
+    if len(muestra) < min(n_muestra, n_unique):
+        muestra = pd.unique(valores)[:n_muestra]
+    return n_unique, muestra
+
 def resumen_columna(col: pd.Series) -> dict:
     """
     Genera un resumen de calidad por columna.
@@ -61,14 +89,20 @@ def resumen_columna(col: pd.Series) -> dict:
     total = len(col)
     n_null = col.isna().sum()
     n_non_null = total - n_null
-    n_unique = col.nunique(dropna=True)
+    if pd.api.types.is_numeric_dtype(col):
+        n_unique, uniques = unicos_numericos(col)
+    else:
+        # una sola pasada de hash para contar únicos y tomar la muestra (sin NaN,
+        # en orden de aparición, igual que nunique/dropna().unique())
+        _, uniques = pd.factorize(col, use_na_sentinel=True)
+        n_unique = len(uniques)
 
     info = {
         "non_null": n_non_null,
         "nulls": n_null,
         "pct_nulls": round(n_null * 100 / total, 2) if total > 0 else np.nan,
         "unique_values": n_unique,
-        "sample_values": ", ".join(map(str, col.dropna().unique()[:5])),
+        "sample_values": ", ".join(map(str, uniques[:5])),
         "inferred_type": inferir_tipo(col),
     }
 
@@ -87,12 +121,36 @@ def resumen_columna(col: pd.Series) -> dict:
 
     return info
 
+def hash_filas(df: pd.DataFrame) -> np.ndarray:
+    """
+    Calcula un hash uint64 por fila, procesando el DataFrame por bloques de
+    DUP_CHUNK_ROWS filas para acotar la memoria intermedia.
+    Las columnas float se normalizan sumando 0.0 (-0.0 pasa a 0.0): el hash
+    usa los bits del valor y duplicated() las considera iguales.
+    """
+    cols_float = df.select_dtypes(include="floating").columns
+    hashes = []
+    for inicio in range(0, len(df), DUP_CHUNK_ROWS):
+        bloque = df.iloc[inicio:inicio + DUP_CHUNK_ROWS]
+        if len(cols_float):
+            bloque = bloque.copy(deep=False)
+            bloque[cols_float] = bloque[cols_float] + 0.0
+        hashes.append(pd.util.hash_pandas_object(bloque, index=False).to_numpy())
+    return np.concatenate(hashes) if hashes else np.empty(0, dtype=np.uint64)
+
 def analizar_duplicados(df: pd.DataFrame) -> pd.DataFrame:
     """
     Analiza duplicados a nivel de fila completa.
     """
     total = len(df)
-    dup_mask = df.duplicated(keep=False)
+
+    # Primero se buscan filas con el mismo hash y luego se confirma con
+    # duplicated() solo sobre esas candidatas (descarta colisiones de hash).
+    _, inversos, conteos = np.unique(hash_filas(df), return_inverse=True, return_counts=True)
+    hash_dup = conteos[inversos] > 1
+    dup_mask = np.zeros(total, dtype=bool)
+    if hash_dup.any():
+        dup_mask[hash_dup] = df[hash_dup].duplicated(keep=False).to_numpy()
     n_dup_rows = dup_mask.sum()
     pct_dup = round(n_dup_rows * 100 / total, 2) if total > 0 else 0
 
@@ -127,7 +185,7 @@ print(f"Leyendo archivo: {INPUT_FILE}")
 if not Path(INPUT_FILE).is_file():
     raise FileNotFoundError(f"No se encontró el archivo: {INPUT_FILE}")
 
-df = pd.read_excel(INPUT_FILE, sheet_name=SHEET_NAME)
+df = pd.read_excel(INPUT_FILE, sheet_name=SHEET_NAME, engine=EXCEL_ENGINE)
 df = limpiar_nombre_columnas(df)
 
 total_filas = len(df)
@@ -138,11 +196,14 @@ print(f"Columnas: {len(df.columns)}")
 # RESUMEN POR COLUMNA
 # ----------------------------------------------------------
 
-resumen_cols = []
-for colname in df.columns:
+def resumen_columna_con_nombre(colname) -> dict:
     info = resumen_columna(df[colname])
     info["columna"] = colname
-    resumen_cols.append(info)
+    return info
+
+# Cada columna es independiente y el trabajo pesado (pandas/NumPy) libera el GIL
+with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(df.columns)))) as executor:
+    resumen_cols = list(executor.map(resumen_columna_con_nombre, df.columns))
 
 df_resumen_columnas = pd.DataFrame(resumen_cols)[
     [
@@ -187,11 +248,12 @@ if cols_precio:
     units_num = a_numerico(df["Unit Sales"])
     price_num = a_numerico(df["Price per Unit"])
 
-    mask_valido = (~sales_num.isna()) & (~units_num.isna()) & (units_num != 0) & (~price_num.isna())
-    precio_calc = sales_num / units_num
+    mask_valido = ~np.isnan(sales_num) & ~np.isnan(units_num) & (units_num != 0) & ~np.isnan(price_num)
 
-    # error relativo absoluto
-    error_rel = (precio_calc - price_num).abs() / price_num.replace(0, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precio_calc = sales_num / units_num
+        # error relativo absoluto
+        error_rel = np.abs(precio_calc - price_num) / np.where(price_num == 0, np.nan, price_num)
     # tolerancia 15%
     mask_error = mask_valido & (error_rel > 0.15)
 
@@ -230,10 +292,11 @@ if cols_precio_ya:
     units_ya = a_numerico(df["Unit Sales Year Ago"])
     price_ya = a_numerico(df["Price per Unit Year Ago"])
 
-    mask_valido_ya = (~sales_ya.isna()) & (~units_ya.isna()) & (units_ya != 0) & (~price_ya.isna())
-    precio_calc_ya = sales_ya / units_ya
+    mask_valido_ya = ~np.isnan(sales_ya) & ~np.isnan(units_ya) & (units_ya != 0) & ~np.isnan(price_ya)
 
-    error_rel_ya = (precio_calc_ya - price_ya).abs() / price_ya.replace(0, np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precio_calc_ya = sales_ya / units_ya
+        error_rel_ya = np.abs(precio_calc_ya - price_ya) / np.where(price_ya == 0, np.nan, price_ya)
     mask_error_ya = mask_valido_ya & (error_rel_ya > 0.15)
 
     n_errores_ya = mask_error_ya.sum()
@@ -294,37 +357,13 @@ if ("Year" in df.columns) and ("Time" in df.columns):
     year_col = a_numerico(df["Year"])
     time_col = df["Time"].astype(str)
 
-    # intentamos extraer los últimos 2 dígitos del año de la cadena
-    # asumiendo formato tipo 'Week Ending 01-05-25'
-    year_from_time = []
-    for val in time_col:
-        # tomamos lo último que parezca año (2 dígitos)
-        # fallback: np.nan
-        try:
-            parts = val.strip().split()
-            # buscamos algo que parezca fecha con guiones
-            candidate = None
-            for p in parts[::-1]:
-                if "-" in p:
-                    candidate = p
-                    break
-            if candidate is not None:
-                # último segmento después del último '-'
-                yy = candidate.split("-")[-1]
-                yy_int = int(yy)
-                if yy_int < 50:  # asumimos 2000+
-                    yy_full = 2000 + yy_int
-                else:
-                    yy_full = 1900 + yy_int
-                year_from_time.append(yy_full)
-            else:
-                year_from_time.append(np.nan)
-        except Exception:
-            year_from_time.append(np.nan)
-
-    year_from_time = pd.Series(year_from_time, index=df.index, name="Year_from_Time")
-
-    mask_both = (~year_col.isna()) & (~year_from_time.isna())
+    # extraemos el año al final de la fecha (vectorizado), en formato tipo
+    # 'Week Ending 01-05-25' o 'Week Ending 01-05-2025'; si no aplica: NaN
+    yy = pd.to_numeric(time_col.str.extract(r"-(\d{4}|\d{2})(?!.*\d)", expand=False), errors="coerce")
+    # año de 4 dígitos tal cual; con 2 dígitos asumimos 2000+ para yy < 50, 1900+ en otro caso
+    year_from_time = np.where(yy >= 100, yy, np.where(yy < 50, 2000 + yy, 1900 + yy))
+
+    mask_both = ~np.isnan(year_col) & ~np.isnan(year_from_time)
     mask_diff = mask_both & (year_col != year_from_time)
 
     n_diff = mask_diff.sum()
@@ -360,17 +399,19 @@ df_reglas_resumen = pd.DataFrame(reglas_resumen) if reglas_resumen else pd.DataF
 
 print(f"Generando archivo de salida: {OUTPUT_FILE}")
 
-with pd.ExcelWriter(OUTPUT_FILE, engine="xlsxwriter") as writer:
-    df_resumen_columnas.to_excel(writer, sheet_name="Resumen_columnas", index=False)
-    df_resumen_dup.to_excel(writer, sheet_name="Duplicados_resumen", index=False)
-    df_detalle_dup.to_excel(writer, sheet_name="Duplicados_detalle", index=False)
+with open_workbook(OUTPUT_FILE) as workbook:
+    formato_header = workbook.add_format(HEADER_FORMAT)
+
+    write_sheet(workbook, "Resumen_columnas", df_resumen_columnas, formato_header)
+    write_sheet(workbook, "Duplicados_resumen", df_resumen_dup, formato_header)
+    write_sheet(workbook, "Duplicados_detalle", df_detalle_dup, formato_header)
 
-    df_reglas_resumen.to_excel(writer, sheet_name="Reglas_resumen", index=False)
+    write_sheet(workbook, "Reglas_resumen", df_reglas_resumen, formato_header)
 
     # hojas con detalle de errores de reglas
     for regla, df_err in detalles_errores.items():
         # nombre de hoja máx 31 caracteres
         sheet_name = f"Err_{regla}"[:31]
-        df_err.to_excel(writer, sheet_name=sheet_name, index=False)
+        write_sheet(workbook, sheet_name, df_err, formato_header)
 
 print("Proceso terminado. Revisa el archivo de reporte generado.")
@@ -1,15 +1,28 @@
 import datetime as dt
+import html
 import random
 import re
+import string
 import tempfile
 import zipfile
 from pathlib import Path
-from typing import Dict, Iterable, List, Tuple
+from typing import IO, Dict, Iterable, List, Optional, Tuple
 from xml.sax.saxutils import escape
 import xml.etree.ElementTree as ET
 
+import numpy as np
+
 
 random.seed(42)
+RNG = np.random.default_rng(42)
+
+# Source of Truth rows generated per block
+SOURCE_CHUNK_ROWS = 100_000
+# Write buffer size for the sheet XMLs
+WRITE_BUFFER_BYTES = 1 << 20
+# Deflate level for the final xlsx: 1 is several times faster than the
+# default (6) at the cost of a slightly larger file
+ZIP_COMPRESSLEVEL = 1
 
 NS_MAIN = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
 NS_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
@@ -19,6 +32,8 @@ NS = {"main": NS_MAIN, "rel": NS_REL, "pkg": NS_PKG}
 ET.register_namespace("", NS_MAIN)
 ET.register_namespace("r", NS_REL)
 
+SHARED_STRINGS_PATH = "xl/sharedStrings.xml"
+
 
 def col_index_to_letter(idx: int) -> str:
     letters = ""
@@ -28,69 +43,158 @@ def col_index_to_letter(idx: int) -> str:
     return letters
 
 
+# Precomputed columns A..ZZ (702 entries); three-letter columns are computed on demand
+COL_LETTER_INDEX = {col_index_to_letter(i): i for i in range(1, 703)}
+
+
 def col_letter_to_index(letter: str) -> int:
+    idx = COL_LETTER_INDEX.get(letter)
+    if idx is not None:
+        return idx
     idx = 0
     for ch in letter:
         idx = idx * 26 + (ord(ch.upper()) - 64)
     return idx
 
 
-def parse_shared_strings(zf: zipfile.ZipFile) -> List[str]:
-    if "xl/sharedStrings.xml" not in zf.namelist():
-        return []
-    root = ET.fromstring(zf.read("xl/sharedStrings.xml"))
-    strings: List[str] = []
-    for si in root.findall("main:si", NS):
-        parts = []
-        for t in si.findall(".//main:t", NS):
-            parts.append(t.text or "")
-        strings.append("".join(parts))
-    return strings
-
-
-def decode_cell(cell: ET.Element, shared_strings: List[str]) -> str:
-    t = cell.attrib.get("t")
-    v = cell.find("main:v", NS)
-    if t == "s" and v is not None:
-        idx = int(v.text)
-        return shared_strings[idx] if idx < len(shared_strings) else ""
-    if t == "inlineStr":
-        t_node = cell.find(".//main:t", NS)
-        return t_node.text or "" if t_node is not None else ""
+SI_TAG_RE = re.compile(rb"<(?:\w+:)?si[\s/>]")
+SI_TAG = "{%s}si" % NS_MAIN
+T_TAG = "{%s}t" % NS_MAIN
+
+
+class LazySharedStrings:
+    # Shared strings of the source workbook, parsed on demand: only the <si>
+    # entries up to the highest requested index (the headers) are decoded and
+    # len() counts entries on the raw bytes, without one object per string.
+    # The ZipFile must stay open while this is used; the sharedStrings member
+    # is opened on first access and closed by close() (or on leaving the with).
+    def __init__(self, zf: zipfile.ZipFile) -> None:
+        self.zf = zf
+        self.present = SHARED_STRINGS_PATH in zf.namelist()
+        self.strings: List[str] = []
+        self.count: Optional[int] = None
+        self._fh: Optional[IO[bytes]] = None
+        self._events = None
+        self._exhausted = not self.present
+
+    def __enter__(self) -> "LazySharedStrings":
+        return self
+
+    def __exit__(self, *exc: object) -> None:
+        self.close()
+
+    def close(self) -> None:
+        self._events = None
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+
+    def __getitem__(self, idx: int) -> str:
+        while idx >= len(self.strings) and not self._exhausted:
+            if self._events is None:
+                self._fh = self.zf.open(SHARED_STRINGS_PATH)
+                self._events = ET.iterparse(self._fh, events=("end",))
+            for _, elem in self._events:
+                if elem.tag == SI_TAG:
+                    self.strings.append("".join(t.text or "" for t in elem.iter(T_TAG)))
+                    elem.clear()
+                    break
+            else:
+                self._exhausted = True
+                self.close()
+        return self.strings[idx]
+
+    def __len__(self) -> int:
+        if self.count is None:
+            self.count = 0
+            if self.present:
+                pending = b""
+                with self.zf.open(SHARED_STRINGS_PATH) as fh:
+                    while True:
+                        chunk = fh.read(SHEET_HEAD_CHUNK)
+                        data = pending + chunk
+                        # keep everything from the last '<' pending in case a
+                        # tag was split across two blocks
+                        cut = data.rfind(b"<") if chunk else len(data)
+                        cut = len(data) if cut < 0 else cut
+                        self.count += len(SI_TAG_RE.findall(data, 0, cut))
+                        pending = data[cut:]
+                        if not chunk:
+                            break
+        return self.count
+
+
+def parse_shared_strings(zf: zipfile.ZipFile) -> LazySharedStrings:
+    return LazySharedStrings(zf)
+
+
+# Patterns to read only the start of a sheet (dimension + header row)
+# directly from the bytes, without building XML elements
+DIMENSION_RE = re.compile(rb'<(?:\w+:)?dimension\b[^>]*?\bref="([^"]+)"')
+ROW_RE = re.compile(rb"<(?:\w+:)?row\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?row>)", re.DOTALL)
+CELL_RE = re.compile(rb"<(?:\w+:)?c\b([^>]*?)(?:/>|>(.*?)</(?:\w+:)?c>)", re.DOTALL)
+REF_ATTR_RE = re.compile(rb'\br="([^"]*)"')
+TYPE_ATTR_RE = re.compile(rb'\bt="([^"]*)"')
+VALUE_RE = re.compile(rb"<(?:\w+:)?v>(.*?)</(?:\w+:)?v>", re.DOTALL)
+TEXT_RE = re.compile(rb"<(?:\w+:)?t\b[^>]*>(.*?)</(?:\w+:)?t>", re.DOTALL)
+SHEET_HEAD_CHUNK = 1 << 16
+
+
+def decode_cell(attrs: bytes, inner: bytes, shared_strings: LazySharedStrings) -> str:
+    t_match = TYPE_ATTR_RE.search(attrs)
+    t = t_match.group(1) if t_match else None
+    v = VALUE_RE.search(inner)
+    if t == b"s" and v is not None:
+        idx = int(v.group(1))
+        try:
+            return shared_strings[idx]
+        except IndexError:
+            return ""
+    if t == b"inlineStr":
+        return html.unescape(b"".join(TEXT_RE.findall(inner)).decode("utf-8"))
     if v is not None:
-        return v.text or ""
+        return html.unescape(v.group(1).decode("utf-8"))
     return ""
 
 
+def read_sheet_head(zf: zipfile.ZipFile, sheet_path: str) -> bytes:
+    # Decompress the sheet in blocks and stop as soon as the first two rows
+    # are complete (or sheetData ends)
+    data = b""
+    with zf.open(sheet_path) as fh:
+        while True:
+            chunk = fh.read(SHEET_HEAD_CHUNK)
+            data += chunk
+            if not chunk or b"</sheetData>" in data or len(ROW_RE.findall(data, 0)) >= 2:
+                return data
+
+
 def parse_sheet_meta(
-    zf: zipfile.ZipFile, sheet_path: str, shared_strings: List[str]
+    zf: zipfile.ZipFile, sheet_path: str, shared_strings: LazySharedStrings
 ) -> Tuple[List[str], int, str]:
     headers: List[str] = []
     max_row = 1
     max_col_letter = None
-    dimension_ref = None
-    with zf.open(sheet_path) as fh:
-        context = ET.iterparse(fh, events=("start", "end"))
-        for event, elem in context:
-            tag = elem.tag.split("}")[-1]
-            if event == "start" and tag == "dimension":
-                dimension_ref = elem.attrib.get("ref")
-            if event == "end" and tag == "row":
-                r_idx = int(elem.attrib.get("r", len(headers) + 1))
-                if r_idx == 1:
-                    row_cells = elem.findall("main:c", NS)
-                    sorted_cells = sorted(
-                        row_cells,
-                        key=lambda c: col_letter_to_index(
-                            re.match(r"([A-Z]+)", c.attrib.get("r", "")).group(1)
-                            if re.match(r"([A-Z]+)", c.attrib.get("r", ""))
-                            else "A"
-                        ),
-                    )
-                    headers = [decode_cell(c, shared_strings) for c in sorted_cells]
-                max_row = max(max_row, r_idx)
-                if r_idx >= 2:
-                    break
+    data = read_sheet_head(zf, sheet_path)
+    dim_match = DIMENSION_RE.search(data)
+    dimension_ref = dim_match.group(1).decode("ascii") if dim_match else None
+    for row_attrs, row_inner in ROW_RE.findall(data)[:2]:
+        r_match = REF_ATTR_RE.search(row_attrs)
+        r_idx = int(r_match.group(1)) if r_match else len(headers) + 1
+        if r_idx == 1:
+            cells = []
+            for cell_attrs, cell_inner in CELL_RE.findall(row_inner):
+                ref_match = REF_ATTR_RE.search(cell_attrs)
+                ref = ref_match.group(1).decode("ascii") if ref_match else ""
+                cells.append((ref, cell_attrs, cell_inner))
+            sorted_cells = sorted(
+                cells,
+                key=lambda c: col_letter_to_index(c[0].rstrip(string.digits) or "A"),
+            )
+            headers = [decode_cell(attrs, inner, shared_strings) for _, attrs, inner in sorted_cells]
+        max_row = max(max_row, r_idx)
+        if r_idx >= 2:
+            break
     if dimension_ref:
         end_ref = dimension_ref.split(":")[1] if ":" in dimension_ref else dimension_ref
         m = re.match(r"([A-Z]+)([0-9]+)", end_ref)
@@ -101,19 +205,96 @@ def parse_sheet_meta(
     return headers, max_row, max_col_letter or "A"
 
 
+XML_SPECIAL_RE = re.compile(r"[&<>]")
+SHARED_STRINGS_CT = "application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"
+SHARED_STRINGS_REL = NS_REL + "/sharedStrings"
+
+
+def _reset_sst_tag(match: "re.Match[bytes]") -> bytes:
+    # count/uniqueCount are optional; drop them so they don't go stale
+    tag = re.sub(rb'\s(?:count|uniqueCount)="\d+"', b"", match.group(0))
+    if tag.endswith(b"/>"):
+        tag = tag[:-2].rstrip() + b"></sst>"
+    return tag
+
+
+class SharedStrings:
+    # Shared strings table: each text is written once to xl/sharedStrings.xml
+    # and cells only store its index (t="s").
+    # New indexes start after the source workbook's strings, so sheets that
+    # are copied unchanged stay valid.
+    def __init__(self, base_count: int = 0) -> None:
+        self.base_count = base_count
+        self.index: Dict[str, int] = {}
+        self.strings: List[str] = []
+
+    def intern(self, value: str) -> int:
+        idx = self.index.get(value)
+        if idx is None:
+            idx = self.base_count + len(self.strings)
+            self.index[value] = idx
+            self.strings.append(value)
+        return idx
+
+    def to_xml(self, original: Optional[bytes]) -> bytes:
+        items = []
+        for value in self.strings:
+            space = ' xml:space="preserve"' if value != value.strip() else ""
+            # most texts (fixed pools, headers) contain no &, < or >
+            text = escape(value) if XML_SPECIAL_RE.search(value) else value
+            items.append(f"<si><t{space}>{text}</t></si>")
+        new_items = "".join(items).encode("utf-8")
+        if original is None:
+            return (
+                '<?xml version="1.0" encoding="UTF-8"?>\n<sst xmlns="{0}">'.format(NS_MAIN).encode("utf-8")
+                + new_items
+                + b"</sst>"
+            )
+        original = re.sub(rb"<sst\b[^>]*>", _reset_sst_tag, original, count=1)
+        end = original.rindex(b"</sst>")
+        return original[:end] + new_items + original[end:]
+
+
+def register_shared_strings(content_types: bytes, workbook_rels: bytes) -> Tuple[bytes, bytes]:
+    # Only used if the source workbook had no xl/sharedStrings.xml
+    override = '<Override PartName="/{0}" ContentType="{1}"/>'.format(
+        SHARED_STRINGS_PATH, SHARED_STRINGS_CT
+    )
+    content_types = content_types.replace(b"</Types>", override.encode("utf-8") + b"</Types>")
+    rel = '<Relationship Id="rIdSharedStrings" Type="{0}" Target="sharedStrings.xml"/>'.format(
+        SHARED_STRINGS_REL
+    )
+    workbook_rels = workbook_rels.replace(
+        b"</Relationships>", rel.encode("utf-8") + b"</Relationships>"
+    )
+    return content_types, workbook_rels
+
+
+def build_row_template(col_letters: List[str], num_flags: List[bool]) -> str:
+    # Full row template ({0} = row number, {1}..{n} = each cell's value or
+    # shared string index), built once per sheet
+    cells = []
+    for pos, (col_letter, is_num) in enumerate(zip(col_letters, num_flags), start=1):
+        cell_type = "" if is_num else ' t="s"'
+        cells.append(f'<c r="{col_letter}{{0}}"{cell_type}><v>{{{pos}}}</v></c>')
+    return '<row r="{0}">' + "".join(cells) + "</row>\n"
+
+
 def build_row_xml(
-    row_idx: int, values: List, num_flags: List[bool], col_letters: List[str]
+    row_idx: int,
+    values: List,
+    num_flags: List[bool],
+    row_template: str,
+    shared: SharedStrings,
 ) -> str:
-    parts = [f'<row r="{row_idx}">']
-    for col_letter, val, is_num in zip(col_letters, values, num_flags):
-        ref = f"{col_letter}{row_idx}"
-        if is_num:
-            parts.append(f'<c r="{ref}"><v>{val}</v></c>')
-        else:
-            text = escape(str(val) if val is not None else "")
-            parts.append(f'<c r="{ref}" t="inlineStr"><is><t>{text}</t></is></c>')
-    parts.append("</row>\n")
-    return "".join(parts)
+    intern = shared.intern
+    return row_template.format(
+        row_idx,
+        *[
+            val if is_num else intern(str(val) if val is not None else "")
+            for val, is_num in zip(values, num_flags)
+        ],
+    )
 
 
 # Synthetic data pools
@@ -227,88 +408,116 @@ def make_category_rows(count: int, brands: List[Dict[str, str]]) -> List[Dict[st
     return rows
 
 
-def rand_money(low=100, high=5000) -> float:
-    return round(random.uniform(low, high), 2)
+def rand_money(size: int, low=100, high=5000) -> np.ndarray:
+    return np.round(RNG.uniform(low, high, size), 2)
 
 
-def rand_units(low=1, high=1200) -> float:
-    return round(random.uniform(low, high), 2)
+def rand_units(size: int, low=1, high=1200) -> np.ndarray:
+    return np.round(RNG.uniform(low, high, size), 2)
 
 
-def rand_ratio() -> float:
-    return round(random.uniform(0.05, 0.95), 4)
+def rand_ratio(size: int) -> np.ndarray:
+    return np.round(RNG.uniform(0.05, 0.95, size), 4)
 
 
-def rand_price() -> float:
-    return round(random.uniform(0.5, 25), 3)
+def rand_price(size: int) -> np.ndarray:
+    return np.round(RNG.uniform(0.5, 25, size), 3)
 
 
-def build_source_row(
+def shared_ids(values: List[str], shared: SharedStrings) -> np.ndarray:
+    return np.array([shared.intern(value) for value in values], dtype=np.int64)
+
+
+def rand_text_ids(pool: List[str], size: int, shared: SharedStrings) -> List[int]:
+    return shared_ids(pool, shared)[RNG.integers(0, len(pool), size)].tolist()
+
+
+def build_source_columns(
+    size: int,
     brand_rows: List[Dict[str, str]],
     category_rows: List[Dict[str, str]],
     week_rows: List[Dict[str, object]],
-) -> List[object]:
-    brand_entry = random.choice(brand_rows)
-    cat_entry = random.choice(category_rows)
-    week_entry = random.choice(week_rows)
-    month_num = random.randint(1, 12)
-    month_name = MONTH_NAMES[month_num - 1]
-    year_val = random.choice([2023, 2024, 2025])
-    total_ounces = round(random.uniform(4, 96), 1)
-    price_unit = rand_price()
-    units = rand_units(5, 800)
-    dollars = round(units * price_unit, 2)
-    price_unit_prev = max(0.1, price_unit * random.uniform(0.85, 1.15))
-    units_prev = rand_units(5, 800)
-    dollars_prev = round(units_prev * price_unit_prev, 2)
-    stores_total = random.randint(25000, 150000)
-    stores_selling = random.randint(max(500, stores_total // 8), stores_total)
-    items_per_store = round(random.uniform(0.5, 8.0), 3)
-    avg_units_per_store = round(units / max(1, stores_selling) * random.uniform(8, 18), 4)
-    avg_dollars_per_store = round(
-        dollars / max(1, stores_selling) * random.uniform(8, 18), 4
+    shared: SharedStrings,
+) -> List[List[object]]:
+    # Generate `size` Source of Truth rows at once (one list per column).
+    # Text columns come out as shared string indexes, so the write loop
+    # only has to format the row.
+    brand_pick = RNG.integers(0, len(brand_rows), size)
+    cat_pick = RNG.integers(0, len(category_rows), size)
+    week_pick = RNG.integers(0, len(week_rows), size)
+    month_idx = RNG.integers(0, 12, size)
+    year_val = RNG.choice([2023, 2024, 2025], size)
+    total_ounces = np.round(RNG.uniform(4, 96, size), 1)
+    price_unit = rand_price(size)
+    units = rand_units(size, 5, 800)
+    dollars = np.round(units * price_unit, 2)
+    price_unit_prev = np.maximum(0.1, price_unit * RNG.uniform(0.85, 1.15, size))
+    units_prev = rand_units(size, 5, 800)
+    dollars_prev = np.round(units_prev * price_unit_prev, 2)
+    stores_total = RNG.integers(25000, 150001, size)
+    stores_selling = RNG.integers(np.maximum(500, stores_total // 8), stores_total + 1)
+    items_per_store = np.round(RNG.uniform(0.5, 8.0, size), 3)
+    avg_units_per_store = np.round(
+        units / np.maximum(1, stores_selling) * RNG.uniform(8, 18, size), 4
+    )
+    avg_dollars_per_store = np.round(
+        dollars / np.maximum(1, stores_selling) * RNG.uniform(8, 18, size), 4
     )
+
+    brands = shared_ids([row["Brand"] for row in brand_rows], shared)[brand_pick].tolist()
+    categories = shared_ids([row["Category"] for row in category_rows], shared)[cat_pick].tolist()
+    subcategories = shared_ids(
+        [row["Subcategory"] for row in category_rows], shared
+    )[cat_pick].tolist()
+    month_codes = [f"{num}. {name[:3]}" for num, name in enumerate(MONTH_NAMES, start=1)]
     return [
-        random.choice(COMPANIES),  # Parent Company-Int Fresh
-        random.choice(FRANCHISES),  # Brand Franchise-Int Fresh
-        random.choice(ATTRIBUTES_POOL),  # Integrated Fresh Attributes
-        "MULO PLUS",  # MULOPLUS
-        cat_entry["Product"],  # Product
-        random.choice(GEOS),  # Geography
-        week_entry["Time"],  # Time
-        week_entry["Week"],  # Week
-        month_num,  # Mes#
-        month_name,  # Mes name
-        f"{month_num}. {month_name[:3]}",  # Mes code
-        year_val,  # Year
-        brand_entry["Brand"],  # Brand-Int Fresh Value
-        total_ounces,  # Total Ounces
-        random.choice(PACKAGE_TYPES),  # Package Type-Int Fresh Value
-        cat_entry["Category"],  # Category-Int Fresh Value
-        cat_entry["Subcategory"],  # Subcategory-Int Fresh Value
-        dollars,  # Dollar Sales
-        dollars_prev,  # Dollar Sales Year Ago
-        units,  # Unit Sales
-        units_prev,  # Unit Sales Year Ago
-        rand_ratio(),  # ACV Weighted Distribution
-        rand_ratio(),  # ACV Weighted Distribution Year Ago
-        items_per_store,  # Avg Weekly Items per Store Selling
-        stores_total,  # Number of Stores
-        round(stores_selling * random.uniform(0.5, 1.2), 3),  # Number of Stores Selling
-        price_unit,  # Price per Unit
-        round(price_unit_prev, 3),  # Price per Unit Year Ago
-        avg_units_per_store,  # Avg Weekly Units per Store Selling
-        avg_dollars_per_store,  # Avg Weekly Dollars per Store Selling
-        brand_entry["Brand"],  # Brand SM
-        cat_entry["Category"],  # Category SM
-        cat_entry["Subcategory"],  # Subcategory SM
+        rand_text_ids(COMPANIES, size, shared),  # Parent Company-Int Fresh
+        rand_text_ids(FRANCHISES, size, shared),  # Brand Franchise-Int Fresh
+        rand_text_ids(ATTRIBUTES_POOL, size, shared),  # Integrated Fresh Attributes
+        [shared.intern("MULO PLUS")] * size,  # MULOPLUS
+        shared_ids([row["Product"] for row in category_rows], shared)[cat_pick].tolist(),  # Product
+        rand_text_ids(GEOS, size, shared),  # Geography
+        shared_ids([row["Time"] for row in week_rows], shared)[week_pick].tolist(),  # Time
+        np.array([row["Week"] for row in week_rows])[week_pick].tolist(),  # Week
+        (month_idx + 1).tolist(),  # Mes#
+        shared_ids(MONTH_NAMES, shared)[month_idx].tolist(),  # Mes name
+        shared_ids(month_codes, shared)[month_idx].tolist(),  # Mes code
+        year_val.tolist(),  # Year
+        brands,  # Brand-Int Fresh Value
+        total_ounces.tolist(),  # Total Ounces
+        rand_text_ids(PACKAGE_TYPES, size, shared),  # Package Type-Int Fresh Value
+        categories,  # Category-Int Fresh Value
+        subcategories,  # Subcategory-Int Fresh Value
+        dollars.tolist(),  # Dollar Sales
+        dollars_prev.tolist(),  # Dollar Sales Year Ago
+        units.tolist(),  # Unit Sales
+        units_prev.tolist(),  # Unit Sales Year Ago
+        rand_ratio(size).tolist(),  # ACV Weighted Distribution
+        rand_ratio(size).tolist(),  # ACV Weighted Distribution Year Ago
+        items_per_store.tolist(),  # Avg Weekly Items per Store Selling
+        stores_total.tolist(),  # Number of Stores
+        np.round(stores_selling * RNG.uniform(0.5, 1.2, size), 3).tolist(),  # Number of Stores Selling
+        price_unit.tolist(),  # Price per Unit
+        np.round(price_unit_prev, 3).tolist(),  # Price per Unit Year Ago
+        avg_units_per_store.tolist(),  # Avg Weekly Units per Store Selling
+        avg_dollars_per_store.tolist(),  # Avg Weekly Dollars per Store Selling
+        brands,  # Brand SM
+        categories,  # Category SM
+        subcategories,  # Subcategory SM
     ]
 
 
 def write_table_sheet(
-    out_path: Path, headers: List[str], rows: Iterable[List[object]], num_flags: List[bool]
+    out_path: Path,
+    headers: List[str],
+    rows: Iterable[List[object]],
+    num_flags: List[bool],
+    shared: SharedStrings,
 ) -> None:
     col_letters = [col_index_to_letter(i + 1) for i in range(len(headers))]
+    header_flags = [False] * len(headers)
+    header_template = build_row_template(col_letters, header_flags)
+    row_template = build_row_template(col_letters, num_flags)
     rows = list(rows)
     total_rows = 1 + len(rows)
     with out_path.open("w", encoding="utf-8", newline="") as f:
@@ -320,9 +529,9 @@ def write_table_sheet(
             '<dimension ref="A1:{0}{1}"/>'.format(col_letters[-1], total_rows)
         )
         f.write("<sheetData>")
-        f.write(build_row_xml(1, headers, [False] * len(headers), col_letters))
+        f.write(build_row_xml(1, headers, header_flags, header_template, shared))
         for idx, row in enumerate(rows, start=2):
-            f.write(build_row_xml(idx, row, num_flags, col_letters))
+            f.write(build_row_xml(idx, row, num_flags, row_template, shared))
         f.write("</sheetData></worksheet>")
 
 
@@ -334,31 +543,40 @@ def write_source_sheet(
     brand_rows: List[Dict[str, str]],
     category_rows: List[Dict[str, str]],
     week_rows: List[Dict[str, object]],
+    shared: SharedStrings,
 ) -> None:
     col_letters = [col_index_to_letter(i + 1) for i in range(len(headers))]
-    with out_path.open("w", encoding="utf-8", newline="") as f:
-        f.write('<?xml version="1.0" encoding="UTF-8"?>\n')
-        f.write(
-            '<worksheet xmlns="{0}" xmlns:r="{1}">'.format(NS_MAIN, NS_REL)
-        )
-        f.write(
-            '<dimension ref="A1:{0}{1}"/>'.format(col_letters[-1], row_count)
-        )
-        f.write("<sheetData>")
-        f.write(build_row_xml(1, headers, [False] * len(headers), col_letters))
+    header_flags = [False] * len(headers)
+    header_template = build_row_template(col_letters, header_flags)
+    format_row = build_row_template(col_letters, num_flags).format
+    # Binary writes: rows are accumulated in a bytearray and flushed to the
+    # file every WRITE_BUFFER_BYTES instead of one write() per row
+    with out_path.open("wb", buffering=WRITE_BUFFER_BYTES) as f:
+        buf = bytearray()
+        buf += '<?xml version="1.0" encoding="UTF-8"?>\n'.encode("utf-8")
+        buf += '<worksheet xmlns="{0}" xmlns:r="{1}">'.format(NS_MAIN, NS_REL).encode("utf-8")
+        buf += '<dimension ref="A1:{0}{1}"/>'.format(col_letters[-1], row_count).encode("utf-8")
+        buf += b"<sheetData>"
+        buf += build_row_xml(1, headers, header_flags, header_template, shared).encode("utf-8")
         data_rows = row_count - 1
-        for idx in range(2, row_count + 1):
-            row = build_source_row(brand_rows, category_rows, week_rows)
-            f.write(build_row_xml(idx, row, num_flags, col_letters))
-        f.write("</sheetData></worksheet>")
+        # Generate in blocks so all rows are never in memory at once
+        for chunk_start in range(0, data_rows, SOURCE_CHUNK_ROWS):
+            size = min(SOURCE_CHUNK_ROWS, data_rows - chunk_start)
+            columns = build_source_columns(size, brand_rows, category_rows, week_rows, shared)
+            for idx, row in enumerate(zip(*columns), start=chunk_start + 2):
+                buf += format_row(idx, *row).encode("utf-8")
+                if len(buf) >= WRITE_BUFFER_BYTES:
+                    f.write(buf)
+                    buf.clear()
+        buf += b"</sheetData></worksheet>"
+        f.write(buf)
 
 
 def main():
     src_path = Path("Salida") / "00. SM-SourceOfTruth.xlsx"
     dst_path = src_path.with_name(src_path.stem + "_fake.xlsx")
 
-    with zipfile.ZipFile(src_path, "r") as zf:
-        shared_strings = parse_shared_strings(zf)
+    with zipfile.ZipFile(src_path, "r") as zf, parse_shared_strings(zf) as shared_strings:
         rels_tree = ET.fromstring(zf.read("xl/_rels/workbook.xml.rels"))
         rel_map = {rel.attrib["Id"]: rel.attrib["Target"] for rel in rels_tree.findall("pkg:Relationship", NS)}
         wb_tree = ET.fromstring(zf.read("xl/workbook.xml"))
@@ -375,6 +593,7 @@ def main():
                 "max_row": max_row,
                 "max_col_letter": max_col_letter,
             }
+        shared_count = len(shared_strings)
 
     # Build fake dictionaries sized like the originals
     week_data = make_week_rows(max(sheet_info["Week Dictionary"]["max_row"] - 1, 0))
@@ -403,7 +622,6 @@ def main():
         False,  # 11-15
         False,
         False,
-        False,
         True,
         True,
         True,  # 16-20
@@ -416,7 +634,7 @@ def main():
         True,
         True,
         True,
-        False,  # 26-30
+        True,  # 26-30
         False,
         False,
         False,  # 31-33
@@ -425,20 +643,23 @@ def main():
     tmp_dir = Path("Salida") / "_tmp_fake_excel"
     tmp_dir.mkdir(exist_ok=True)
     replacements: Dict[str, Path] = {}
+    shared = SharedStrings(base_count=shared_count)
 
     # Week Dictionary
     week_headers = sheet_info["Week Dictionary"]["headers"]  # type: ignore
     week_rows = [[row["Time"], row["Week"]] for row in week_data]
     week_num_flags = [False, True]
     week_sheet_path = tmp_dir / "week.xml"
-    write_table_sheet(week_sheet_path, week_headers, week_rows, week_num_flags)
+    write_table_sheet(week_sheet_path, week_headers, week_rows, week_num_flags, shared)
     replacements[sheet_info["Week Dictionary"]["path"]] = week_sheet_path  # type: ignore
 
     # Brand Dictionary
     brand_headers = sheet_info["Brand Dictionary"]["headers"]  # type: ignore
     brand_rows_for_sheet = [[row["Brand"], row["Name"]] for row in brand_data]
     brand_sheet_path = tmp_dir / "brand.xml"
-    write_table_sheet(brand_sheet_path, brand_headers, brand_rows_for_sheet, [False, False])
+    write_table_sheet(
+        brand_sheet_path, brand_headers, brand_rows_for_sheet, [False, False], shared
+    )
     replacements[sheet_info["Brand Dictionary"]["path"]] = brand_sheet_path  # type: ignore
 
     # Category Dictionary
@@ -448,7 +669,11 @@ def main():
     ]
     category_sheet_path = tmp_dir / "category.xml"
     write_table_sheet(
-        category_sheet_path, category_headers, category_rows_for_sheet, [False, False, False]
+        category_sheet_path,
+        category_headers,
+        category_rows_for_sheet,
+        [False, False, False],
+        shared,
     )
     replacements[sheet_info["Category Dictionary"]["path"]] = category_sheet_path  # type: ignore
 
@@ -462,17 +687,35 @@ def main():
         brand_data,
         category_data,
         week_data,
+        shared,
     )
     replacements[sheet_info["Source of Truth"]["path"]] = source_sheet_path  # type: ignore
 
     with zipfile.ZipFile(src_path, "r") as src_zip, zipfile.ZipFile(
-        dst_path, "w", compression=zipfile.ZIP_DEFLATED
+        dst_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=ZIP_COMPRESSLEVEL
     ) as out_zip:
+        src_names = set(src_zip.namelist())
+        has_shared_strings = SHARED_STRINGS_PATH in src_names
+        content_types = src_zip.read("[Content_Types].xml")
+        workbook_rels = src_zip.read("xl/_rels/workbook.xml.rels")
+        if not has_shared_strings:
+            content_types, workbook_rels = register_shared_strings(content_types, workbook_rels)
+        patched = {
+            "[Content_Types].xml": content_types,
+            "xl/_rels/workbook.xml.rels": workbook_rels,
+            SHARED_STRINGS_PATH: shared.to_xml(
+                src_zip.read(SHARED_STRINGS_PATH) if has_shared_strings else None
+            ),
+        }
         for item in src_zip.infolist():
             if item.filename in replacements:
                 out_zip.write(replacements[item.filename], arcname=item.filename)
+            elif item.filename in patched:
+                out_zip.writestr(item, patched.pop(item.filename))
             else:
                 out_zip.writestr(item, src_zip.read(item.filename))
+        for name, data in patched.items():
+            out_zip.writestr(name, data)
 
     # Cleanup temporary XMLs
     for path in tmp_dir.iterdir():
@@ -9,15 +9,22 @@ Script para transformar el archivo de Brand Franchise / Int Fresh:
     * Las nuevas columnas se insertan justo después de 'Time'
 - Crea una segunda hoja en el Excel con un diccionario:
     * Week No, Week Ending
+- Por defecto guarda cada mes en Parquet (datos + diccionario en archivos
+  separados) para que unificar_outputs.py los lea rápido; ver OUTPUT_FORMAT.
 
 Formato esperado en Time:
     'Week Ending MM-DD-YY'
     Ejemplo: 'Week Ending 01-05-25' -> 01 = mes, 05 = día, 25 = año (2025)
 """
 
+import os
+from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from time import perf_counter
+import numpy as np
 import pandas as pd
+import xlsxwriter
 
 # ==========================
 # CONFIGURACIÓN EDITABLE
@@ -50,111 +57,193 @@ OUTPUT_DIR = Path("Salida")
 OUTPUT_TEMPLATE = "SM_CIRCANA_{month:02d}_{year}.xlsx"
 YEAR_FALLBACK = 2024
 
+# Formato de los archivos por mes:
+# - "parquet": mucho más rápido de escribir y de leer en unificar_outputs.py
+#   (requiere pyarrow). Se generan dos archivos por mes: los datos
+#   (SM_CIRCANA_01_2025.parquet) y el diccionario de semanas
+#   (SM_CIRCANA_01_2025{WEEK_DICT_SUFFIX}.parquet).
+# - "xlsx": un Excel con las hojas 'Datos' y 'Diccionario_Semanas'.
+OUTPUT_FORMAT = "parquet"
+WEEK_DICT_SUFFIX = "_semanas"
+PARQUET_COMPRESSION = "zstd"
+
 # Hoja a leer: índice (0 = primera hoja) o nombre de la hoja
 SHEET_NAME = 0
 
 # Nombre de la columna que contiene el texto tipo 'Week Ending 01-05-25'
 TIME_COL = "Time"
 
+# Columnas a leer de cada archivo: None = todas, o una lista de nombres,
+# ej: ["Product", "Geography", "Time", "Dollar Sales"]. TIME_COL se lee siempre.
+# Leer solo lo necesario reduce el tiempo de lectura y la memoria.
+USECOLS = None
 
-def parse_time_to_datetime(time_str: str):
-    """Convierte 'Week Ending MM-DD-YY' a datetime; devuelve NaT si no se puede parsear."""
-    if pd.isna(time_str):
-        return pd.NaT
-    date_part = str(time_str).replace("Week Ending", "").strip()
-    return pd.to_datetime(date_part, format="%m-%d-%y", errors="coerce")
+# Internamente Time se guarda como fecha; al escribir en Excel se vuelve a
+# generar el texto con este formato
+TIME_LABEL_FORMAT = "Week Ending %m-%d-%y"
+
+# Procesos en paralelo (cada mes se procesa de forma independiente)
+MAX_WORKERS = os.cpu_count() or 1
+
+# Parquet solo si pyarrow está instalado (pip install pyarrow); si no, xlsx
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+# Motor de lectura: calamine (Rust, mucho más rápido) si está instalado
+# (pip install python-calamine); si no, openpyxl.
+try:
+    import python_calamine  # noqa: F401
+    EXCEL_ENGINE = "calamine"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+
+# Último porcentaje dibujado por cada barra (prefix)
+_last_progress = {}
 
 
 def print_progress(done: int, total: int, prefix: str = "Progreso"):
-    """Imprime una barra de progreso simple en consola."""
+    """Imprime una barra de progreso simple en consola (solo si cambió el %)."""
     if total <= 0:
         return
     pct = int((done / total) * 100)
+    if _last_progress.get(prefix) == pct:
+        return
+    # Al llegar al 100% se olvida el estado para la siguiente corrida
+    if pct >= 100:
+        _last_progress.pop(prefix, None)
+    else:
+        _last_progress[prefix] = pct
     bar_len = 30
     filled = int(bar_len * pct / 100)
     bar = "#" * filled + "-" * (bar_len - filled)
     print(f"\r{prefix}: [{bar}] {pct:3d}%", end="", flush=True)
 
 
-def parse_week_info(time_str: str) -> pd.Series:
+def parse_time_column(times: pd.Series) -> pd.Series:
     """
-    Recibe un string como 'Week Ending 01-05-25'
-    y devuelve Week, Mes#, Mes name, Mes code, Year.
+    Convierte toda la columna 'Week Ending MM-DD-YY' a datetime de una sola vez;
+    devuelve NaT donde no se puede parsear. Si ya es fecha se devuelve tal cual.
     """
-    dt = parse_time_to_datetime(time_str)
-    if pd.isna(dt):
-        return pd.Series(
-            {
-                "Week": pd.NA,
-                "Mes#": pd.NA,
-                "Mes name": pd.NA,
-                "Mes code": pd.NA,
-                "Year": pd.NA,
-            }
-        )
-
-    # Número de semana ISO
-    week_no = dt.isocalendar().week
-
-    # Número de mes
-    mes_num = dt.month
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return times
+    date_part = times.astype(str).str.replace("Week Ending", "", regex=False).str.strip()
+    return pd.to_datetime(date_part, format="%m-%d-%y", errors="coerce")
 
-    # Nombre de mes (en inglés: January, February, etc.)
-    mes_name = dt.strftime("%B")
 
-    # Código de mes tipo "1. Jan"
-    mes_code = f"{mes_num}. {dt.strftime('%b')}"
+# Nombres de mes (en inglés, sin depender del locale) indexados por número de
+# mes; la posición 0 queda vacía para las fechas que no se pudieron parsear
+MONTH_NAMES = np.array(
+    [None, "January", "February", "March", "April", "May", "June",
+     "July", "August", "September", "October", "November", "December"],
+    dtype=object,
+)
+# Código de mes tipo "1. Jan"
+MONTH_CODES = np.array(
+    [None] + [f"{i}. {name[:3]}" for i, name in enumerate(MONTH_NAMES[1:], start=1)],
+    dtype=object,
+)
 
-    year = dt.year
 
-    return pd.Series(
+def format_time_labels(times: pd.Series) -> pd.Series:
+    """
+    Regenera el texto 'Week Ending MM-DD-YY' donde Time viene guardado como
+    fecha (NaT queda vacío). También cubre columnas mixtas de fechas y textos,
+    que aparecen al unir meses guardados como fecha con meses que quedaron
+    como texto. Se formatea una sola vez por fecha distinta.
+    """
+    if pd.api.types.is_datetime64_any_dtype(times):
+        is_date = None
+        dates = times
+    elif times.dtype == object and pd.api.types.infer_dtype(times, skipna=True) in ("datetime", "mixed"):
+        is_date = times.map(lambda v: isinstance(v, datetime)).to_numpy(dtype=bool)
+        if not is_date.any():
+            return times
+        dates = pd.to_datetime(times[is_date])
+    else:
+        return times
+
+    unique = pd.DatetimeIndex(dates.dropna().unique())
+    labels = dates.map(pd.Series(unique.strftime(TIME_LABEL_FORMAT), index=unique))
+    if is_date is None:
+        return labels
+    out = times.copy()
+    out[is_date] = labels
+    return out
+
+
+def calendar_info(dt: pd.Series) -> pd.DataFrame:
+    """
+    A partir de una serie datetime devuelve Week, Mes#, Mes name, Mes code, Year
+    (vacíos donde la fecha es NaT).
+    """
+    mes_num = dt.dt.month.astype("Int64")
+    # índice en las tablas de nombres (0 = fecha vacía)
+    mes_idx = mes_num.fillna(0).to_numpy(dtype=np.int64)
+    return pd.DataFrame(
         {
-            "Week": week_no,
+            # Número de semana ISO
+            "Week": dt.dt.isocalendar().week,
+            # Número de mes
             "Mes#": mes_num,
-            "Mes name": mes_name,
-            "Mes code": mes_code,
-            "Year": year,
-        }
+            # Nombre de mes (en inglés: January, February, etc.)
+            "Mes name": MONTH_NAMES[mes_idx],
+            # Código de mes tipo "1. Jan"
+            "Mes code": MONTH_CODES[mes_idx],
+            "Year": dt.dt.year.astype("Int64"),
+        },
+        index=dt.index,
     )
 
 
-def add_calendar_columns(df: pd.DataFrame, time_col: str = "Time") -> pd.DataFrame:
+def time_labels_roundtrip(times: pd.Series, dt: pd.Series) -> bool:
+    """
+    Indica si Time puede guardarse como fecha sin cambiar el texto que se
+    escribe en Excel: todas las filas se parsearon y TIME_LABEL_FORMAT
+    reproduce exactamente los textos originales.
+    """
+    if pd.api.types.is_datetime64_any_dtype(times):
+        return True
+    if dt.notna().sum() != times.notna().sum():
+        return False
+    unique = pd.DatetimeIndex(dt.dropna().unique())
+    labels = set(unique.strftime(TIME_LABEL_FORMAT))
+    return labels == set(times.dropna().astype(str).unique())
+
+
+def add_calendar_columns(df: pd.DataFrame, time_col: str = "Time", dt: pd.Series = None) -> pd.DataFrame:
     """
     Agrega las columnas Week, Mes#, Mes name, Mes code, Year al DataFrame original
     e inserta estas columnas inmediatamente después de la columna 'Time',
     conservando TODAS las columnas originales en su orden.
+    Si ya se tiene Time parseado (dt), se reutiliza en vez de parsear de nuevo.
     """
     if time_col not in df.columns:
         raise KeyError(f"La columna '{time_col}' no existe en el archivo.")
 
     # Calcular la info de calendario
-    week_info = df[time_col].apply(parse_week_info)
-
-    # Unir al DataFrame original (añadimos las columnas nuevas al final de momento)
-    df_out = pd.concat([df, week_info], axis=1)
-
-    original_cols = list(df.columns)
-    new_cols = ["Week", "Mes#", "Mes name", "Mes code", "Year"]
-
-    # Solo columnas nuevas que realmente existen (por seguridad)
-    new_cols = [c for c in new_cols if c in df_out.columns]
-
-    # Construimos el orden:
-    # 1. Todas las columnas originales, en orden
-    # 2. Justo después de 'Time', insertamos las nuevas columnas
-    ordered_cols = []
-    for col in original_cols:
-        ordered_cols.append(col)
-        if col == time_col:
-            ordered_cols.extend(new_cols)
-
-    # 3. Si quedara alguna columna extra (por ejemplo, de week_info),
-    #    que no esté aún en ordered_cols, la agregamos al final.
-    for col in df_out.columns:
-        if col not in ordered_cols:
-            ordered_cols.append(col)
-
-    df_out = df_out[ordered_cols]
+    if dt is None:
+        dt = parse_time_column(df[time_col])
+    week_info = calendar_info(dt)
+
+    # Insertar las columnas nuevas justo después de 'Time'. Se trabaja sobre
+    # una copia superficial para no modificar el DataFrame recibido y sin
+    # reconstruir el resto de columnas (como pasaría con concat + reordenar).
+    df_out = df.copy(deep=False)
+
+    # Guardar Time como fecha (8 bytes por fila en vez de un texto por fila);
+    # el texto se regenera al escribir en Excel (format_time_labels). Solo si
+    # todas las filas con Time se pudieron parsear y el texto regenerado es
+    # idéntico al original (p. ej. 'Week Ending 1-5-25' no lo sería).
+    if time_labels_roundtrip(df[time_col], dt):
+        df_out[time_col] = dt
+
+    loc = df_out.columns.get_loc(time_col) + 1
+    for offset, col in enumerate(week_info.columns):
+        df_out.insert(loc + offset, col, week_info[col])
 
     return df_out
 
@@ -163,7 +252,7 @@ def build_week_dictionary(df: pd.DataFrame, time_col: str = "Time") -> pd.DataFr
     """
     Construye un diccionario de semanas con:
         - Week No
-        - Week Ending (texto exacto de la columna Time)
+        - Week Ending (la columna Time, como fecha si se pudo parsear)
 
     La numeración de Week No viene de la columna 'Week' generada previamente.
     """
@@ -172,7 +261,11 @@ def build_week_dictionary(df: pd.DataFrame, time_col: str = "Time") -> pd.DataFr
     if "Week" not in df.columns:
         raise KeyError("La columna 'Week' no existe. Primero debes generarla.")
 
-    tmp = df[[time_col, "Week"]].drop_duplicates().sort_values("Week")
+    # Week depende solo de Time, así que basta deduplicar por Time: se marca la
+    # primera aparición de cada Time (una pasada de hash sobre una sola columna)
+    # y solo esas pocas filas se copian y se ordenan
+    first_rows = ~df[time_col].duplicated().to_numpy()
+    tmp = df.loc[first_rows, [time_col, "Week"]].sort_values("Week")
 
     # Renombrar columnas como pide el usuario
     week_dict = tmp.rename(columns={time_col: "Time", "Week": "Week"})
@@ -183,39 +276,115 @@ def build_week_dictionary(df: pd.DataFrame, time_col: str = "Time") -> pd.DataFr
     return week_dict
 
 
-def infer_month_year(df: pd.DataFrame, time_col: str, default_month: int) -> tuple[int, int]:
+def infer_month_year(df: pd.DataFrame, time_col: str, default_month: int, dt: pd.Series = None) -> tuple[int, int]:
     """Obtiene mes y año desde la primera fila válida de Time; usa defaults si falla."""
-    valid_times = df[time_col].dropna()
-    if not valid_times.empty:
-        dt = parse_time_to_datetime(valid_times.iloc[0])
-        if not pd.isna(dt):
-            return dt.month, dt.year
+    valid = df[time_col].notna().to_numpy()
+    if valid.any():
+        if dt is None:
+            dt = parse_time_column(df[time_col])
+        first = dt[valid].iloc[0]
+        if not pd.isna(first):
+            return first.month, first.year
     return default_month, YEAR_FALLBACK
 
 
+# Mismo estilo de encabezado que usa pandas en to_excel
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
+# Filas que write_sheet convierte a object de una vez
+WRITE_CHUNK_ROWS = 50_000
+
+
+def open_workbook(path) -> xlsxwriter.Workbook:
+    """
+    Abre un libro de xlsxwriter en modo constant_memory: cada fila se vuelca a
+    disco al escribirse en vez de armar todo el libro en memoria (las hojas se
+    llenan con write_sheet).
+    """
+    return xlsxwriter.Workbook(
+        path,
+        {
+            "constant_memory": True,
+            "nan_inf_to_errors": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        },
+    )
+
+
+def write_sheet(workbook, sheet_name: str, df: pd.DataFrame, header_format) -> None:
+    """
+    Escribe un DataFrame en una hoja nueva, fila por fila (el modo
+    constant_memory de xlsxwriter exige escribir en orden de filas).
+    Los NaN/NA quedan como celdas vacías, igual que con DataFrame.to_excel.
+    La conversión a object se hace por bloques de filas para no duplicar en
+    memoria el DataFrame completo.
+    """
+    ws = workbook.add_worksheet(sheet_name)
+    ws.write_row(0, 0, [str(c) for c in df.columns], header_format)
+    row_num = 1
+    for start in range(0, len(df), WRITE_CHUNK_ROWS):
+        part = df.iloc[start:start + WRITE_CHUNK_ROWS]
+        values = part.astype(object).where(part.notna(), None)
+        for row in values.itertuples(index=False, name=None):
+            ws.write_row(row_num, 0, row)
+            row_num += 1
+
+
 def process_file_for_month(month: int, input_file: str, sheet_name=SHEET_NAME, time_col: str = TIME_COL) -> Path:
     """Lee, transforma y guarda un archivo; devuelve la ruta de salida."""
-    df = pd.read_excel(input_file, sheet_name=sheet_name)
+    usecols = None
+    if USECOLS is not None:
+        keep = set(USECOLS) | {time_col}
+        usecols = lambda c: c in keep  # noqa: E731
+    df = pd.read_excel(input_file, sheet_name=sheet_name, usecols=usecols, engine=EXCEL_ENGINE)
+
+    # Parsear Time una sola vez y reutilizarlo en todos los pasos
+    dt = parse_time_column(df[time_col]) if time_col in df.columns else None
 
     # Agregar columnas de calendario (quedarán detrás de 'Time')
-    df_transformed = add_calendar_columns(df, time_col=time_col)
+    df_transformed = add_calendar_columns(df, time_col=time_col, dt=dt)
 
     # Crear diccionario de semanas
     week_dict = build_week_dictionary(df_transformed, time_col=time_col)
 
     # Determinar mes/año para el nombre de salida
-    month_for_name, year_for_name = infer_month_year(df_transformed, time_col=time_col, default_month=month)
+    month_for_name, year_for_name = infer_month_year(df_transformed, time_col=time_col, default_month=month, dt=dt)
 
+    # OUTPUT_DIR lo crea main() antes de lanzar los procesos
     output_path = OUTPUT_DIR / OUTPUT_TEMPLATE.format(month=month_for_name, year=year_for_name)
-    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
 
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df_transformed.to_excel(writer, sheet_name="Datos", index=False)
-        week_dict.to_excel(writer, sheet_name="Diccionario_Semanas", index=False)
+    if OUTPUT_FORMAT == "parquet" and PARQUET_AVAILABLE:
+        try:
+            return write_month_parquet(output_path, df_transformed, week_dict)
+        except (TypeError, ValueError) as e:
+            # p.ej. columnas de texto con números mezclados que Parquet no acepta
+            print(f"\n[ADVERTENCIA] No se pudo guardar {output_path.stem} en Parquet ({e}); se guarda en Excel.")
 
+    write_month_excel(output_path, df_transformed, week_dict, time_col=time_col)
     return output_path
 
 
+def write_month_parquet(output_path: Path, df_transformed: pd.DataFrame, week_dict: pd.DataFrame) -> Path:
+    """Guarda los datos y el diccionario de semanas de un mes en Parquet; devuelve la ruta de datos."""
+    datos_path = output_path.with_suffix(".parquet")
+    week_path = output_path.with_name(f"{output_path.stem}{WEEK_DICT_SUFFIX}.parquet")
+    df_transformed.to_parquet(datos_path, engine="pyarrow", compression=PARQUET_COMPRESSION, index=False)
+    week_dict.to_parquet(week_path, engine="pyarrow", compression=PARQUET_COMPRESSION, index=False)
+    return datos_path
+
+
+def write_month_excel(output_path: Path, df_transformed: pd.DataFrame, week_dict: pd.DataFrame, time_col: str = TIME_COL) -> None:
+    """Guarda un mes en Excel con las hojas 'Datos' y 'Diccionario_Semanas'."""
+    # Time vuelve a quedar como texto 'Week Ending MM-DD-YY' en el Excel
+    df_transformed = df_transformed.assign(**{time_col: format_time_labels(df_transformed[time_col])})
+    week_dict = week_dict.assign(**{time_col: format_time_labels(week_dict[time_col])})
+
+    with open_workbook(output_path) as workbook:
+        header_format = workbook.add_format(HEADER_FORMAT)
+        write_sheet(workbook, "Datos", df_transformed, header_format)
+        write_sheet(workbook, "Diccionario_Semanas", week_dict, header_format)
+
+
 def main():
     start_time = perf_counter()
     start_month, end_month = MONTH_RANGE
@@ -231,18 +400,31 @@ def main():
     total_months = len(months_to_process)
     processed = 0
 
-    for month in months_to_process:
-        input_file = INPUT_FILES[month]
-        try:
-            output_path = process_file_for_month(month, input_file)
-            print(f"[OK] Mes {month:02d}: {input_file} -> {output_path}")
-        except FileNotFoundError:
-            print(f"[ADVERTENCIA] No se encontró el archivo para mes {month:02d}: {input_file}")
-        except Exception as e:
-            print(f"[ERROR] Falló el procesamiento de {input_file}: {e}")
-        finally:
-            processed += 1
-            print_progress(processed, total_months, prefix="Procesando meses")
+    OUTPUT_DIR.mkdir(parents=True, exist_ok=True)
+    if OUTPUT_FORMAT == "parquet" and not PARQUET_AVAILABLE:
+        print("[INFO] pyarrow no está instalado; los archivos por mes se guardan en Excel.")
+
+    # Cada mes es independiente (leer + transformar + guardar), así que se
+    # procesan en paralelo; los mensajes salen en el orden en que terminan.
+    workers = max(1, min(total_months, MAX_WORKERS))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = {
+            pool.submit(process_file_for_month, month, INPUT_FILES[month]): month
+            for month in months_to_process
+        }
+        for future in as_completed(futures):
+            month = futures[future]
+            input_file = INPUT_FILES[month]
+            try:
+                output_path = future.result()
+                print(f"[OK] Mes {month:02d}: {input_file} -> {output_path}")
+            except FileNotFoundError:
+                print(f"[ADVERTENCIA] No se encontró el archivo para mes {month:02d}: {input_file}")
+            except Exception as e:
+                print(f"[ERROR] Falló el procesamiento de {input_file}: {e}")
+            finally:
+                processed += 1
+                print_progress(processed, total_months, prefix="Procesando meses")
 
     elapsed = perf_counter() - start_time
     print(f"\nTiempo total de procesamiento: {elapsed:0.2f} segundos")
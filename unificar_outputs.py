@@ -19,10 +19,26 @@ También agrega en 'Source of truth' (si existen las columnas necesarias):
 - Subcategory SM: mapea 'Product' -> Category Dictionary[Product] y retorna [subcategory]
 """
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from time import perf_counter
 import pandas as pd
 
+# Motor de lectura de Excel, escritura de hojas y barra de progreso compartidos
+# con transformar_weeks.py
+# (TIME_COL y format_time_labels: en los Parquet por mes Time viene como fecha y
+# aquí se vuelve a escribir como texto 'Week Ending MM-DD-YY')
+from transformar_weeks import (
+    EXCEL_ENGINE,
+    HEADER_FORMAT,
+    TIME_COL,
+    WEEK_DICT_SUFFIX,
+    format_time_labels,
+    open_workbook,
+    print_progress,
+    write_sheet,
+)
+
 # ==========================
 # CONFIGURACIÓN EDITABLE
 # ==========================
@@ -30,8 +46,13 @@ import pandas as pd
 # Carpeta donde están los archivos de salida individuales
 INPUT_FOLDER = r"Salida"
 
-# Patrón de nombres de archivos a unificar (dentro de INPUT_FOLDER)
-FILE_PATTERN = "SM_CIRCANA_*.xlsx"
+# Patrón de nombres de archivos a unificar (dentro de INPUT_FOLDER).
+# Se aceptan los dos formatos que genera transformar_weeks.py (ver OUTPUT_FORMAT):
+# - .parquet: datos + diccionario de semanas en '<nombre>{WEEK_DICT_SUFFIX}.parquet'
+# - .xlsx: un Excel con las hojas de Datos y Diccionario_Semanas
+# Si un mismo mes está en ambos formatos, se usa el archivo más reciente.
+FILE_PATTERN = "SM_CIRCANA_*"
+INPUT_SUFFIXES = (".parquet", ".xlsx")
 
 # Archivo Excel de salida unificado
 OUTPUT_FILE = r"Salida\00. SM-SourceOfTruth.xlsx"
@@ -63,35 +84,156 @@ CATEGORY_DICT_KEY_COL = "Product"            # en Category Dictionary
 CATEGORY_DICT_CAT_COL = "Category"           # retorna a Category SM
 CATEGORY_DICT_SUBCAT_COL = "Subcategory"     # retorna a Subcategory SM
 
+# Columnas de 'Datos' a llevar a Source of truth: None = todas, o una lista de
+# nombres. Las llaves de los diccionarios (SOT_BRAND_KEY_COL, SOT_PRODUCT_KEY_COL)
+# se leen siempre para poder calcular las columnas SM.
+USECOLS = None
+
 # Si quieres agregar una columna indicando el archivo de origen en Source of truth
 ADD_SOURCE_COLUMN = False
 SOURCE_COLUMN_NAME = "Source_File"
 
+# Hilos para leer los archivos de entrada en paralelo
+MAX_WORKERS = 8
+
+# pyarrow (opcional) para leer los archivos por mes en Parquet
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+    pq = None
+
 
 def safe_read_excel(path, sheet):
     """Lee un Excel con manejo de errores y retorna DataFrame (o vacío)."""
     try:
-        return pd.read_excel(path, sheet_name=sheet)
+        return pd.read_excel(path, sheet_name=sheet, engine=EXCEL_ENGINE)
     except Exception as e:
         print(f"[ADVERTENCIA] No se pudo leer '{path}' (sheet={sheet}): {e}")
         return pd.DataFrame()
 
 
-def print_progress(done: int, total: int, prefix: str = "Progreso"):
-    """Imprime una barra de progreso simple en consola."""
-    if total <= 0:
-        return
-    pct = int((done / total) * 100)
-    bar_len = 30
-    filled = int(bar_len * pct / 100)
-    bar = "#" * filled + "-" * (bar_len - filled)
-    print(f"\r{prefix}: [{bar}] {pct:3d}%", end="", flush=True)
+def datos_columns():
+    """Conjunto de columnas de 'Datos' a leer según USECOLS (None = todas)."""
+    if USECOLS is None:
+        return None
+    return set(USECOLS) | {SOT_BRAND_KEY_COL, SOT_PRODUCT_KEY_COL}
+
+
+def find_input_files(input_path: Path) -> list:
+    """
+    Busca los archivos por mes (.parquet o .xlsx) en la carpeta de entrada,
+    sin contar los diccionarios de semanas de Parquet. Si un mes aparece en
+    los dos formatos, se queda con el modificado más recientemente.
+    """
+    by_stem = {}
+    for f in input_path.glob(FILE_PATTERN):
+        if f.suffix.lower() not in INPUT_SUFFIXES or f.stem.endswith(WEEK_DICT_SUFFIX):
+            continue
+        prev = by_stem.get(f.stem)
+        if prev is None or f.stat().st_mtime > prev.stat().st_mtime:
+            by_stem[f.stem] = f
+    return [by_stem[stem] for stem in sorted(by_stem)]
+
+
+def read_parquet_file(f: Path):
+    """
+    Lee los datos de un mes en Parquet y su diccionario de semanas
+    ('<nombre>{WEEK_DICT_SUFFIX}.parquet'). Devuelve (datos, df_week); los
+    datos quedan como tabla de pyarrow para unirlos sin pasar por pandas.
+    """
+    df_datos = None
+    df_week = None
+
+    try:
+        if pq is None:
+            raise ImportError("pyarrow no está instalado (pip install pyarrow)")
+        keep = datos_columns()
+        columns = None if keep is None else [c for c in pq.read_schema(f).names if c in keep]
+        df_datos = pq.read_table(f, columns=columns)
+        if ADD_SOURCE_COLUMN:
+            df_datos = df_datos.append_column(SOURCE_COLUMN_NAME, pa.repeat(f.name, df_datos.num_rows))
+    except Exception as e:
+        print(f"[ADVERTENCIA] No se pudo leer {f}: {e}")
+
+    week_file = f.with_name(f"{f.stem}{WEEK_DICT_SUFFIX}.parquet")
+    try:
+        df_week = pd.read_parquet(week_file)
+    except Exception as e:
+        print(f"[ADVERTENCIA] No se pudo leer el diccionario de semanas {week_file}: {e}")
+
+    return df_datos, df_week
+
+
+def read_input_file(f: Path):
+    """
+    Lee las hojas de Datos y Diccionario_Semanas de un archivo abriéndolo una
+    sola vez. Devuelve (df_datos, df_week); None en la hoja que no se pudo leer.
+    """
+    if f.suffix.lower() == ".parquet":
+        return read_parquet_file(f)
+
+    df_datos = None
+    df_week = None
+
+    try:
+        xl = pd.ExcelFile(f, engine=EXCEL_ENGINE)
+    except Exception as e:
+        print(f"[ADVERTENCIA] No se pudo abrir {f}: {e}")
+        return df_datos, df_week
+
+    with xl:
+        # Datos
+        try:
+            keep = datos_columns()
+            df_datos = xl.parse(DATOS_SHEET_NAME, usecols=None if keep is None else (lambda c: c in keep))
+            if ADD_SOURCE_COLUMN:
+                df_datos[SOURCE_COLUMN_NAME] = f.name
+        except Exception as e:
+            print(f"[ADVERTENCIA] No se pudo leer hoja '{DATOS_SHEET_NAME}' de {f}: {e}")
+
+        # Diccionario semanas
+        try:
+            df_week = xl.parse(WEEK_DICT_SHEET_NAME)
+        except Exception as e:
+            print(f"[ADVERTENCIA] No se pudo leer hoja '{WEEK_DICT_SHEET_NAME}' de {f}: {e}")
+
+    return df_datos, df_week
+
+
+def concat_rows(frames: list) -> pd.DataFrame:
+    """
+    Une DataFrames por filas con un único pd.concat. Con un solo archivo se
+    devuelve tal cual (ya trae índice 0..n-1), sin copiar todos los datos.
+
+    Si todos vienen de Parquet (tablas de pyarrow), se unen con
+    pa.concat_tables (sin copiar) y se convierten a pandas una sola vez,
+    liberando la memoria de Arrow a medida que se convierte. Para eso se
+    vacía la lista recibida.
+    """
+    if pa is not None and frames and all(isinstance(f, pa.Table) for f in frames):
+        try:
+            table = pa.concat_tables(frames, promote_options="default")
+        except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+            # esquemas incompatibles entre meses, o pyarrow < 14 (sin
+            # promote_options): se unen en pandas
+            table = None
+        if table is not None:
+            frames.clear()
+            return table.to_pandas(split_blocks=True, self_destruct=True)
+
+    if pa is not None:
+        frames = [f.to_pandas() if isinstance(f, pa.Table) else f for f in frames]
+    if len(frames) == 1:
+        return frames[0]
+    return pd.concat(frames, ignore_index=True)
 
 
 def main():
     start_time = perf_counter()
     input_path = Path(INPUT_FOLDER)
-    files = sorted(input_path.glob(FILE_PATTERN))
+    files = find_input_files(input_path)
 
     if not files:
         print(f"No se encontraron archivos en '{INPUT_FOLDER}' con patrón '{FILE_PATTERN}'.")
@@ -101,33 +243,34 @@ def main():
     for f in files:
         print(" -", f)
 
-    datos_list = []
-    week_list = []
     total_files = len(files)
     processed = 0
 
     # --------------------------
     # 1) Unificar inputs
     # --------------------------
-    for f in files:
-        # Datos
-        try:
-            df_datos = pd.read_excel(f, sheet_name=DATOS_SHEET_NAME)
-            if ADD_SOURCE_COLUMN:
-                df_datos[SOURCE_COLUMN_NAME] = f.name
-            datos_list.append(df_datos)
-        except Exception as e:
-            print(f"[ADVERTENCIA] No se pudo leer hoja '{DATOS_SHEET_NAME}' de {f}: {e}")
-
-        # Diccionario semanas
-        try:
-            df_week = pd.read_excel(f, sheet_name=WEEK_DICT_SHEET_NAME)
-            week_list.append(df_week)
-        except Exception as e:
-            print(f"[ADVERTENCIA] No se pudo leer hoja '{WEEK_DICT_SHEET_NAME}' de {f}: {e}")
-
-        processed += 1
-        print_progress(processed, total_files, prefix="Unificando archivos")
+    # Las lecturas son independientes: se hacen en paralelo y luego se
+    # ordenan según la lista de archivos para que el concat no cambie.
+    # Los diccionarios (dimensiones) se leen en el mismo pool, en paralelo con
+    # los archivos; sus resultados se usan en el paso 2.
+    results = [None] * total_files
+    with ThreadPoolExecutor(max_workers=MAX_WORKERS) as pool:
+        brand_future = pool.submit(safe_read_excel, BRAND_DICT_FILE, BRAND_DICT_SHEET)
+        category_future = pool.submit(safe_read_excel, CATEGORY_DICT_FILE, CATEGORY_DICT_SHEET)
+        futures = {pool.submit(read_input_file, f): i for i, f in enumerate(files)}
+        for future in as_completed(futures):
+            # pop: el Future también guarda el resultado; si se queda en el
+            # dict, los DataFrames por archivo no se liberan tras el concat
+            results[futures.pop(future)] = future.result()
+            processed += 1
+            print_progress(processed, total_files, prefix="Unificando archivos")
+    # El último Future del bucle sigue guardando su tabla Arrow; sin esta
+    # referencia, to_pandas(self_destruct=True) puede liberar cada tabla
+    del future
+
+    datos_list = [df_datos for df_datos, _ in results if df_datos is not None]
+    week_list = [df_week for _, df_week in results if df_week is not None]
+    del results
 
     if not datos_list and not week_list:
         print("No se pudo leer ninguna hoja de entrada.")
@@ -135,19 +278,32 @@ def main():
 
     # Source of truth (antes: Datos)
     if datos_list:
-        sot = pd.concat(datos_list, ignore_index=True)
+        sot = concat_rows(datos_list)
+        # Liberar los DataFrames por archivo: ya están copiados en sot
+        datos_list.clear()
+
+        # Las llaves de los diccionarios tienen pocos valores distintos: como
+        # category, los map se resuelven sobre las categorías y no fila a fila
+        for col in [SOT_BRAND_KEY_COL, SOT_PRODUCT_KEY_COL]:
+            if col in sot.columns:
+                sot[col] = sot[col].astype("category")
     else:
         sot = pd.DataFrame()
         print("[INFO] No se unificó 'Datos' porque no se encontró ninguna hoja válida.")
 
     # Week Dictionary (antes: Diccionario_Semanas)
     if week_list:
-        week_dict = pd.concat(week_list, ignore_index=True)
+        week_dict = concat_rows(week_list)
 
         # Renombrar y limpiar columnas para que queden como ('Week', 'Time')
         if {"Week No", "Week Ending"}.issubset(set(week_dict.columns)):
             week_dict = week_dict.rename(columns={"Week No": "Week", "Week Ending": "Time"})
 
+        # Time como texto antes de deduplicar: si unos meses lo traen como fecha
+        # y otros como texto, la misma semana no debe quedar dos veces
+        if TIME_COL in week_dict.columns:
+            week_dict[TIME_COL] = format_time_labels(week_dict[TIME_COL])
+
         # Intentar eliminar duplicados por ('Week', 'Time') si existen
         cols_for_dupes = [c for c in ["Week", "Time", "Time "] if c in week_dict.columns]
         if not cols_for_dupes:
@@ -167,15 +323,19 @@ def main():
         print("[INFO] No se unificó 'Diccionario_Semanas' porque no se encontró ninguna hoja válida.")
 
     # --------------------------
-    # 2) Leer dimensiones
+    # 2) Leer dimensiones (ya leídas en paralelo en el paso 1)
     # --------------------------
-    brand_dict = safe_read_excel(BRAND_DICT_FILE, BRAND_DICT_SHEET)
-    category_dict = safe_read_excel(CATEGORY_DICT_FILE, CATEGORY_DICT_SHEET)
+    brand_dict = brand_future.result()
+    category_dict = category_future.result()
 
     # --------------------------
     # 3) Enriquecer Source of truth con columnas SM
     # --------------------------
     if not sot.empty:
+        # Las columnas SM nuevas se juntan aquí y se agregan al final en un solo
+        # concat (un bloque nuevo en vez de una inserción por columna)
+        sm_cols = {}
+
         # --- Brand SM (map) ---
         if (
             not brand_dict.empty
@@ -189,13 +349,17 @@ def main():
                 .drop_duplicates(subset=[BRAND_DICT_KEY_COL])
                 .set_index(BRAND_DICT_KEY_COL)[BRAND_DICT_VALUE_COL]
             )
-            sot["Brand SM"] = sot[SOT_BRAND_KEY_COL].map(brand_map)
+            brand_sm = sot[SOT_BRAND_KEY_COL].map(brand_map)
+            if "Brand SM" in sot.columns:
+                sot["Brand SM"] = brand_sm
+            else:
+                sm_cols["Brand SM"] = brand_sm
         else:
             print("[INFO] No se pudo calcular 'Brand SM' (faltan columnas o Brand Dictionary).")
             if "Brand SM" not in sot.columns:
-                sot["Brand SM"] = pd.NA
+                sm_cols["Brand SM"] = pd.NA
 
-        # --- Category SM / Subcategory SM (merge por Product) ---
+        # --- Category SM / Subcategory SM (map por Product) ---
         needed_cat_cols = {CATEGORY_DICT_KEY_COL, CATEGORY_DICT_CAT_COL, CATEGORY_DICT_SUBCAT_COL}
         if (
             not category_dict.empty
@@ -211,30 +375,22 @@ def main():
             # Evitar colisiones si ya existen
             for col in ["Category SM", "Subcategory SM"]:
                 if col in sot.columns:
-                    sot = sot.drop(columns=[col])
-
-            sot = sot.merge(
-                cat_small,
-                how="left",
-                left_on=SOT_PRODUCT_KEY_COL,
-                right_on=CATEGORY_DICT_KEY_COL
-            )
-
-            # Renombrar a las columnas finales
-            sot = sot.rename(columns={
-                CATEGORY_DICT_CAT_COL: "Category SM",
-                CATEGORY_DICT_SUBCAT_COL: "Subcategory SM",
-            })
+                    del sot[col]
 
-            # Si el key col del diccionario no es exactamente igual al de SOT, lo quitamos
-            if CATEGORY_DICT_KEY_COL != SOT_PRODUCT_KEY_COL and CATEGORY_DICT_KEY_COL in sot.columns:
-                sot = sot.drop(columns=[CATEGORY_DICT_KEY_COL])
+            # Product -> (Category, Subcategory) es 1:1, así que basta con dos
+            # map en lugar de un merge que copia todo el SOT
+            cat_small = cat_small.set_index(CATEGORY_DICT_KEY_COL)
+            sm_cols["Category SM"] = sot[SOT_PRODUCT_KEY_COL].map(cat_small[CATEGORY_DICT_CAT_COL])
+            sm_cols["Subcategory SM"] = sot[SOT_PRODUCT_KEY_COL].map(cat_small[CATEGORY_DICT_SUBCAT_COL])
         else:
             print("[INFO] No se pudo calcular 'Category SM/Subcategory SM' (faltan columnas o Category Dictionary).")
             if "Category SM" not in sot.columns:
-                sot["Category SM"] = pd.NA
+                sm_cols["Category SM"] = pd.NA
             if "Subcategory SM" not in sot.columns:
-                sot["Subcategory SM"] = pd.NA
+                sm_cols["Subcategory SM"] = pd.NA
+
+        if sm_cols:
+            sot = pd.concat([sot, pd.DataFrame(sm_cols, index=sot.index)], axis=1, copy=False)
 
     # --------------------------
     # 4) Guardar archivo final
@@ -242,12 +398,19 @@ def main():
     output_path = Path(OUTPUT_FILE)
     output_path.parent.mkdir(parents=True, exist_ok=True)
 
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+    # Time se escribe como texto 'Week Ending MM-DD-YY'
+    for df in (sot, week_dict):
+        if TIME_COL in df.columns:
+            df[TIME_COL] = format_time_labels(df[TIME_COL])
+
+    with open_workbook(output_path) as workbook:
+        header_format = workbook.add_format(HEADER_FORMAT)
+
         # Siempre intentamos crear las 4 hojas (aunque vayan vacías)
-        sot.to_excel(writer, sheet_name=OUT_SOT_SHEET, index=False)
-        week_dict.to_excel(writer, sheet_name=OUT_WEEK_SHEET, index=False)
-        brand_dict.to_excel(writer, sheet_name=OUT_BRAND_SHEET, index=False)
-        category_dict.to_excel(writer, sheet_name=OUT_CATEGORY_SHEET, index=False)
+        write_sheet(workbook, OUT_SOT_SHEET, sot, header_format)
+        write_sheet(workbook, OUT_WEEK_SHEET, week_dict, header_format)
+        write_sheet(workbook, OUT_BRAND_SHEET, brand_dict, header_format)
+        write_sheet(workbook, OUT_CATEGORY_SHEET, category_dict, header_format)
 
     elapsed = perf_counter() - start_time
     print(f"\rArchivo unificado guardado en: {output_path}")